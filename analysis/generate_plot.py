@@ -1,146 +1,240 @@
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from datasets import load_dataset
+import functools
+import hashlib
 import os
+import tempfile
 import numpy as np
 
-# Load datasets
-worker_desire_df = load_dataset("SALT-NLP/WORKBank", data_files="worker_data/domain_worker_desires.csv")["train"].to_pandas()
-expert_ratings_df = load_dataset("SALT-NLP/WORKBank", data_files="expert_ratings/expert_rated_technological_capability.csv")["train"].to_pandas()
-
-# Aggregate worker desire by Task
-worker_agg = worker_desire_df.groupby("Task").agg({
-    "Automation Desire Rating": "mean",
-    "Occupation (O*NET-SOC Title)": "first"
-}).reset_index()
-
-# Aggregate expert capability by Task
-expert_agg = expert_ratings_df.groupby("Task").agg({
-    "Automation Capacity Rating": "mean"
-}).reset_index()
-
-# Merge datasets
-merged_df = pd.merge(worker_agg, expert_agg, on="Task")
-
-# Calculate a "Priority Score"
-merged_df['Priority Score'] = merged_df['Automation Desire Rating'] * merged_df['Automation Capacity Rating']
-merged_df = merged_df.sort_values('Priority Score', ascending=False)
-
-# Create the figure
-fig = go.Figure()
-
-# Get unique occupations
-occupations = sorted(merged_df['Occupation (O*NET-SOC Title)'].unique())
-colors = px.colors.qualitative.Alphabet
-
-# Add Scatter traces for each occupation
-for i, occ in enumerate(occupations):
-    occ_data = merged_df[merged_df['Occupation (O*NET-SOC Title)'] == occ]
-    
-    fig.add_trace(
-        go.Scatter(
-            x=occ_data['Automation Capacity Rating'],
-            y=occ_data['Automation Desire Rating'],
-            mode='markers',
-            name=occ,
-            text=occ_data['Task'],
-            textposition="top center",
-            customdata=np.stack((occ_data['Priority Score'],), axis=-1),
-            hovertemplate="<b>%{text}</b><br>Occupation: " + occ + "<br>Capability: %{x:.2f}<br>Desire: %{y:.2f}<br>Priority: %{customdata[0]:.2f}<extra></extra>",
-            marker=dict(size=12, opacity=0.8, color=colors[i % len(colors)]),
-            legendgroup=occ,
-        )
+# WORKBank CSVs on Hugging Face, cached locally as Parquet after the first load
+DATA_FILES = {
+    "worker": "worker_data/domain_worker_desires.csv",
+    "expert": "expert_ratings/expert_rated_technological_capability.csv",
+}
+CACHE_DIR = os.path.expanduser("~/.cache/workbank")
+
+# Shared by every trace: the trace name is the occupation, customdata holds Priority Score
+HOVER_TEMPLATE = "<b>%{text}</b><br>Occupation: %{fullData.name}<br>Capability: %{x:.2f}<br>Desire: %{y:.2f}<br>Priority: %{customdata[0]:.2f}<extra></extra>"
+
+
+def _load_cached(name):
+    """WORKBank CSV `name` as a DataFrame, read from the local Parquet cache when present."""
+    path = os.path.join(CACHE_DIR, f"{name}.parquet")
+    if os.path.exists(path):
+        return pd.read_parquet(path)
+    from datasets import load_dataset
+
+    df = load_dataset("SALT-NLP/WORKBank", data_files=DATA_FILES[name])["train"].to_pandas()
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # Write to a temporary file first so an interrupted write never leaves a truncated cache
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".parquet.tmp")
+    os.close(fd)
+    try:
+        df.to_parquet(tmp_path, compression="zstd")
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return df
+
+
+@functools.lru_cache(maxsize=1)
+def _worker():
+    """Worker desire ratings with float32 ratings and categorical Task/Occupation."""
+    df = _load_cached("worker")
+    df["Automation Desire Rating"] = df["Automation Desire Rating"].astype("float32")
+    df["Task"] = df["Task"].astype("category")
+    df["Occupation (O*NET-SOC Title)"] = df["Occupation (O*NET-SOC Title)"].astype("category")
+    return df
+
+
+@functools.lru_cache(maxsize=1)
+def _expert():
+    """Expert capability ratings with float32 ratings and categorical Task."""
+    df = _load_cached("expert")
+    df["Automation Capacity Rating"] = df["Automation Capacity Rating"].astype("float32")
+    df["Task"] = df["Task"].astype("category")
+    return df
+
+
+def _points(df):
+    """Per-point arrays for the occupation traces, in the row order of `df`."""
+    return dict(
+        x=df['Automation Capacity Rating'].to_numpy(),
+        y=df['Automation Desire Rating'].to_numpy(),
+        text=df['Task'].astype(str).to_numpy(),
+        customdata=df['Priority Score'].to_numpy(dtype=np.float32, copy=False)[:, None],
+    )
+
+
+def main():
+    # Load datasets
+    worker_desire_df = _worker()
+    expert_ratings_df = _expert()
+
+    # Fingerprint the inputs (and this script) so an up-to-date plot is not re-serialized
+    input_hash = hashlib.sha256()
+    for df in (worker_desire_df, expert_ratings_df):
+        input_hash.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    with open(__file__, "rb") as f:
+        input_hash.update(f.read())
+    input_stamp = f"<!-- workbank-input-hash: {input_hash.hexdigest()} -->"
+
+    output_path = os.path.abspath("public/index.html")
+    if os.path.exists(output_path):
+        with open(output_path, encoding="utf-8") as f:
+            if f.readline().rstrip("\n") == input_stamp:
+                print(f"Interactive plot is up to date: {output_path}")
+                return
+
+    # Use one Task dtype on both sides so the per-Task aggregates align
+    task_dtype = pd.CategoricalDtype(worker_desire_df["Task"].cat.categories.union(expert_ratings_df["Task"].cat.categories))
+    worker_tasks = worker_desire_df["Task"].astype(task_dtype)
+    expert_tasks = expert_ratings_df["Task"].astype(task_dtype)
+
+    # Aggregate worker desire and expert capability by Task
+    worker_agg = worker_desire_df.groupby(worker_tasks, sort=False, observed=True).agg(**{
+        "Automation Desire Rating": ("Automation Desire Rating", "mean"),
+        "Occupation (O*NET-SOC Title)": ("Occupation (O*NET-SOC Title)", "first"),
+    })
+    expert_capacity = expert_ratings_df.groupby(expert_tasks, sort=False, observed=True)["Automation Capacity Rating"].mean()
+
+    # Align the per-Task aggregates on their shared index
+    merged_df = worker_agg.join(expert_capacity, how="inner").reset_index()
+
+    # Calculate a "Priority Score"
+    merged_df['Priority Score'] = np.multiply(
+        merged_df['Automation Desire Rating'].to_numpy(dtype=np.float32, copy=False),
+        merged_df['Automation Capacity Rating'].to_numpy(dtype=np.float32, copy=False),
+        out=np.empty(len(merged_df), dtype=np.float32),
     )
 
-# Create Dropdown Buttons
-buttons = []
-
-# "All Occupations" Button
-buttons.append(dict(
-    method="update",
-    label="All Occupations",
-    args=[
-        {"visible": [True] * len(occupations), "mode": ["markers"] * len(occupations)},
-        {"title": "WORKBank: All Occupations"}
-    ]
-))
-
-# Individual Occupation Buttons
-for i, occ in enumerate(occupations):
-    occ_data = merged_df[merged_df['Occupation (O*NET-SOC Title)'] == occ]
-    num_tasks = len(occ_data)
-    
-    # Visibility: only this occupation is True
-    visible = [o == occ for o in occupations]
-    
-    # Mode: markers+text if < 10 tasks, else markers
-    modes = []
-    for j, o in enumerate(occupations):
-        if o == occ:
-            modes.append('markers+text' if num_tasks < 10 else 'markers')
-        else:
-            modes.append('markers')
-            
+    # Create the figure
+    fig = go.Figure()
+
+    # Get unique occupations (dropping those with no tasks left after the merge)
+    merged_df['Occupation (O*NET-SOC Title)'] = merged_df['Occupation (O*NET-SOC Title)'].cat.remove_unused_categories()
+    occupations = merged_df['Occupation (O*NET-SOC Title)'].cat.categories.sort_values().tolist()
+    colors = px.colors.qualitative.Alphabet
+
+    # Sort once by occupation and locate each occupation's contiguous block of rows
+    merged_df = merged_df.sort_values('Occupation (O*NET-SOC Title)', kind='stable').reset_index(drop=True)
+    occ_values = merged_df['Occupation (O*NET-SOC Title)'].to_numpy()
+    starts = np.searchsorted(occ_values, occupations, side='left')
+    ends = np.searchsorted(occ_values, occupations, side='right')
+
+    # Build the per-point arrays once; each occupation is a contiguous slice of them
+    n_occ = len(occupations)
+    all_points = _points(merged_df)
+
+    # Add a WebGL Scatter trace for each occupation, so the legend can toggle it
+    for i, occ in enumerate(occupations):
+        occ_points = {key: values[starts[i]:ends[i]] for key, values in all_points.items()}
+        fig.add_trace(
+            go.Scattergl(
+                x=occ_points['x'],
+                y=occ_points['y'],
+                mode='markers',
+                name=occ,
+                text=occ_points['text'],
+                textposition="top center",
+                customdata=occ_points['customdata'],
+                hovertemplate=HOVER_TEMPLATE,
+                marker=dict(size=12, opacity=0.8, color=colors[i % len(colors)]),
+                legendgroup=occ,
+            )
+        )
+
+    # Create Dropdown Buttons
+    buttons = []
+
+    # "All Occupations" Button
     buttons.append(dict(
         method="update",
-        label=occ[:40] + "..." if len(occ) > 40 else occ,
+        label="All Occupations",
         args=[
-            {"visible": visible, "mode": modes},
-            {"title": f"WORKBank: {occ} ({num_tasks} tasks)"}
+            {"visible": True, "mode": "markers"},
+            {"title": "WORKBank: All Occupations"}
         ]
     ))
 
-# Update Layout
-fig.update_layout(
-    updatemenus=[dict(
-        buttons=buttons,
-        direction="down",
-        showactive=True,
-        x=0.0,
-        xanchor="left",
-        y=1.15,
-        yanchor="top",
-        bgcolor="white",
-        bordercolor="gray"
-    )],
-    title=dict(
-        text="<b>WORKBank: Automation Landscape</b>",
-        font=dict(size=24),
-        x=0.5,
-        y=0.98
-    ),
-    xaxis=dict(
-        title="AI Expert-rated Capability", 
-        range=[0.5, 5.5],
-        gridcolor='rgba(0,0,0,0.05)'
-    ),
-    yaxis=dict(
-        title="Worker-related Desire", 
-        range=[0.5, 5.5],
-        gridcolor='rgba(0,0,0,0.05)'
-    ),
-    height=900,
-    width=1200,
-    template="plotly_white",
-    showlegend=True,
-    legend=dict(
-        title="Occupations",
-        font=dict(size=10),
-        y=0.5,
-        x=1.02,
-        xanchor="left"
-    ),
-    margin=dict(l=50, r=250, t=150, b=50)
-)
-
-# Add quadrant lines
-fig.add_shape(type="line", x0=3, y0=0.5, x1=3, y1=5.5, line=dict(color="rgba(0,0,0,0.2)", dash="dash"))
-fig.add_shape(type="line", x0=0.5, y0=3, x1=5.5, y1=3, line=dict(color="rgba(0,0,0,0.2)", dash="dash"))
-
-# Save to HTML
-os.makedirs("public", exist_ok=True)
-output_path = os.path.abspath("public/index.html")
-fig.write_html(output_path, include_plotlyjs='cdn')
-
-print(f"Cleaned interactive plot saved to: {output_path}")
+    # Individual Occupation Buttons
+    vis_matrix = np.eye(n_occ, dtype=bool)
+    for i, occ in enumerate(occupations):
+        num_tasks = ends[i] - starts[i]
+
+        # Visibility: only this occupation is True
+        visible = vis_matrix[i].tolist()
+
+        # Mode: markers+text if < 10 tasks, else markers. Hidden traces ignore
+        # it and "All Occupations" resets it, so one value covers every trace.
+        mode = 'markers+text' if num_tasks < 10 else 'markers'
+
+        buttons.append(dict(
+            method="update",
+            label=occ[:40] + "..." if len(occ) > 40 else occ,
+            args=[
+                {"visible": visible, "mode": mode},
+                {"title": f"WORKBank: {occ} ({num_tasks} tasks)"}
+            ]
+        ))
+
+    # Update Layout
+    fig.update_layout(
+        updatemenus=[dict(
+            buttons=buttons,
+            direction="down",
+            showactive=True,
+            x=0.0,
+            xanchor="left",
+            y=1.15,
+            yanchor="top",
+            bgcolor="white",
+            bordercolor="gray"
+        )],
+        title=dict(
+            text="<b>WORKBank: Automation Landscape</b>",
+            font=dict(size=24),
+            x=0.5,
+            y=0.98
+        ),
+        xaxis=dict(
+            title="AI Expert-rated Capability", 
+            range=[0.5, 5.5],
+            gridcolor='rgba(0,0,0,0.05)'
+        ),
+        yaxis=dict(
+            title="Worker-related Desire", 
+            range=[0.5, 5.5],
+            gridcolor='rgba(0,0,0,0.05)'
+        ),
+        height=900,
+        width=1200,
+        template="plotly_white",
+        showlegend=True,
+        legend=dict(
+            title="Occupations",
+            font=dict(size=10),
+            y=0.5,
+            x=1.02,
+            xanchor="left"
+        ),
+        margin=dict(l=50, r=250, t=150, b=50)
+    )
+
+    # Add quadrant lines
+    fig.add_shape(type="line", x0=3, y0=0.5, x1=3, y1=5.5, line=dict(color="rgba(0,0,0,0.2)", dash="dash"))
+    fig.add_shape(type="line", x0=0.5, y0=3, x1=5.5, y1=3, line=dict(color="rgba(0,0,0,0.2)", dash="dash"))
+
+    # Save to HTML
+    os.makedirs("public", exist_ok=True)
+    html = fig.to_html(include_plotlyjs='cdn', full_html=True, validate=False, div_id="wb")
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write(input_stamp + "\n" + html)
+    print(f"Cleaned interactive plot saved to: {output_path}")
+
+
+if __name__ == "__main__":
+    main()